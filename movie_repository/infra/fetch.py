@@ -1,33 +1,57 @@
 import asyncio
-import json
 import math
 import re
-from typing import Callable, Awaitable
+import threading
+from types import MappingProxyType
+from typing import Callable, AsyncIterator, Mapping
 
 import aiohttp
+import orjson
 from lxml import etree
 
 from movie_repository.util.logger import logger
 from movie_repository.entity.entity_movie import MovieEntityV2, PlatformDetail
 from .init_config import push_file_dump_msg, json_file, push_db_insert_msg
 from .warmup import WarmupHandler, Status, generate_key
-from movie_repository.util.default_util import StringUtil, TimeUtil
+from movie_repository.util.default_util import StringUtil, TimeUtil, RateLimiter
 
 # 全局注册器
 _task_run_registry = []
 _rollback_run_registry = []
 _rick_control_timeout = 8
+_task_interval = 3  # 同一平台相邻两个任务启动的最小间隔(秒)
+# 预编译的演员列表xpath，避免每次调用时重复编译
+_actors_xpath = etree.XPath("//div[contains(text(), '出演演员')]//text()")
+_actors_split_pattern = re.compile(r'\s*[\n\r]+\s*')  # 按换行拆分演员并顺带去除两侧空白
+_actors_filter_pattern = re.compile(r'[《》]')  # 含书名号的为作品名而非演员
+_float_leading_chars = frozenset('0123456789+-.nNiI')  # 可被float()解析的字符串的合法首字符(含nan/inf)
+_html_parsers = threading.local()  # lxml解析器非线程安全，每个线程按编码各自复用一份
+# 腾讯详情页中的__PINIA__数据块以及需要修正为合法JSON的JS片段
+_pinia_start = b"window.__PINIA__="
+_pinia_end = b"</script>"
+_pinia_fix_pattern = re.compile(rb"undefined|Array\.prototype\.slice\.call\(|\}\)")
+_pinia_fix_table = {
+    b"undefined": b"null",
+    b"Array.prototype.slice.call(": b"",
+    b"})": b"}",
+}
 
 
 class Platform:
     def __init__(self, name):
         self.name = name
         self.tasks = []
+        self.limiter = RateLimiter(1, _task_interval)
 
     async def run_tasks(self):
-        for task in self.tasks:
-            await task
-            await asyncio.sleep(3)  # 每个任务延迟3秒后进入下一个任务
+        try:
+            for task in self.tasks:
+                async with self.limiter:  # 按平台限流，任务本身耗时超过间隔时不再额外等待
+                    await task
+        finally:
+            # 被取消或失败时关闭尚未启动的任务协程，避免"never awaited"警告(已结束的协程关闭无副作用)
+            for task in self.tasks:
+                task.close()
 
 
 def inject(cls):
@@ -42,10 +66,25 @@ def checkpoint_rollback(cls):
 
 async def execute_tasks(platform_tasks, log_message):
     logger.info(log_message)
-    tasks = [platform.run_tasks() for platform in platform_tasks.values()]
+    tasks = [asyncio.create_task(platform.run_tasks(), name=platform_name)
+             for platform_name, platform in platform_tasks.items()]
     for platform_name, platform in platform_tasks.items():
         logger.info(f' -- {platform_name} of {len(platform.tasks)} task(s)')
-    await asyncio.gather(*tasks)
+    try:
+        # 各平台并发执行，任一平台失败时取消其余平台(等价于3.11的TaskGroup)，未完成的批次留待回滚
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # 取出所有失败平台的异常并记录，再重新抛出第一个
+        failed = [task for task in done if task.exception() is not None]
+        for task in failed:
+            logger.error(f"Platform '{task.get_name()}' failed: {task.exception()!r}")
+        if failed:
+            raise failed[0].exception()
+    finally:
+        # 抓取任务全部在此结束，在发起请求的同一模块中关闭共享的HTTP会话
+        await close_session()
 
 
 async def run_all(warmup: WarmupHandler,
@@ -82,39 +121,117 @@ headers = {
                   'Chrome/87.0.4280.141 Safari/537.36'
 }
 
+# 全局共享的HTTP会话，复用连接池来避免每次请求都重新握手
+_session: aiohttp.ClientSession | None = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """懒加载获取全局共享的ClientSession"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300, enable_cleanup_closed=True)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+
+async def close_session():
+    """关闭全局共享的ClientSession"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def read_until(response: aiohttp.ClientResponse,
+                     start: bytes,
+                     end: bytes,
+                     chunk_size: int = 16384) -> bytes:
+    """
+    分块读取响应体，当start标记之后出现end标记时停止缓冲，返回已缓冲的内容
+    剩余的响应体会被读取并丢弃，使连接可以回到连接池中复用
+    """
+    buffer = bytearray()
+    start_at = -1  # start标记结束的位置
+    scanned = 0  # 已经搜索过的位置，新块到达后只需从这里(回退标记长度)继续搜索
+    async for chunk in response.content.iter_chunked(chunk_size):
+        buffer.extend(chunk)
+        if start_at < 0:
+            index = buffer.find(start, max(scanned - len(start) + 1, 0))
+            if index < 0:
+                scanned = len(buffer)
+                continue
+            start_at = scanned = index + len(start)
+        if buffer.find(end, max(scanned - len(end) + 1, start_at)) >= 0:
+            # 未读完的响应体会导致连接被关闭，这里读完但不再缓冲
+            async for _ in response.content.iter_chunked(chunk_size):
+                pass
+            break
+        scanned = len(buffer)
+    return bytes(buffer)
+
 
 def safe_float_conversion(value, default=-1.0):
     """尝试将给定的值转换为浮点数，如果失败则返回默认值"""
+    # 先用分支排除空值和明显非数字的字符串，避免频繁构造并抛出异常
+    if value is None or value == '':
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        value = str(value)
+    stripped = value.lstrip()  # float()允许前导空白
+    if not stripped or stripped[0] not in _float_leading_chars:
+        return default
     try:
         return float(value)
     except ValueError:
         return default
 
 
-def filter_strings(strings: [str]) -> [str]:
-    # 使用列表推导式过滤字符串
-    filtered_strings = [s for s in strings if s and "《" not in s and "》" not in s]
-    return filtered_strings
+def split_actors(text: str) -> [str]:
+    """将演员块的文本一次性拆分为演员列表，并过滤掉空串和作品名"""
+    return [s for s in _actors_split_pattern.split(text.removeprefix('出演演员：'))
+            if s and not _actors_filter_pattern.search(s)]
+
+
+def get_html_parser(encoding: str = 'utf-8') -> etree.HTMLParser:
+    """获取当前线程中指定编码的HTMLParser，避免每次解析都重新构造解析器"""
+    parsers: dict[str, etree.HTMLParser] = getattr(_html_parsers, 'parsers', None)
+    if parsers is None:
+        parsers = _html_parsers.parsers = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = etree.HTMLParser(encoding=encoding, recover=True,
+                                                      remove_blank_text=True, huge_tree=False)
+    return parser
+
+
+def parse_actors(response_bytes: bytes, encoding: str = 'utf-8') -> [str]:
+    """从B站电影详情页的HTML中解析出演员列表(同步方法，在线程中执行)"""
+    html = etree.fromstring(response_bytes, get_html_parser(encoding))
+    # 使用xpath定位到演员列表的dom元素上来获取innerText()值
+    div_texts = _actors_xpath(html)
+    return split_actors(''.join(div_texts).strip())
 
 
 async def abstract_run_with_checkpoint(platform: str,
                                        page: int,
                                        pagesize: int,
                                        warmup: WarmupHandler,
-                                       async_func: Callable[[], Awaitable[list[MovieEntityV2]]],
+                                       async_func: Callable[[], AsyncIterator[MovieEntityV2]],
                                        retry_on_task_id: str = ''):
     logger.info(f"(Batch {page}*{pagesize}) Staring fetching response from platform '{platform}'.")
     # 生成 Batch Task ID
     unique_batch_id: str = retry_on_task_id if retry_on_task_id.startswith('BATCH.TASK') else generate_key('BATCH.TASK')
-    batch_begin_time: str = TimeUtil.now()
+    batch_begin_ns: int = TimeUtil.now_ns()
     warmup.put_batch_trace(task_id=unique_batch_id, source=platform,
                            batch=page, pagesize=pagesize, status=Status.PENDING,
-                           begin=batch_begin_time)
-    batch_results: list[MovieEntityV2] = await async_func()  # 执行lambda
-    push_db_insert_msg(batch_results)
+                           begin_ns=batch_begin_ns)
+    async for movie in async_func():  # 执行lambda，每构造好一个实体就立即推送而不必等待整批完成
+        push_db_insert_msg([movie])
     warmup.put_batch_trace(task_id=unique_batch_id, source=platform,
                            batch=page, pagesize=pagesize, status=Status.FINISHED,
-                           begin=batch_begin_time, end=TimeUtil.now())
+                           begin_ns=batch_begin_ns, end_ns=TimeUtil.now_ns())
 
 
 # B站数据源 ~ 通过控制反转注入到任务容器 min_page 0 total 5520
@@ -126,7 +243,7 @@ class Bilibili:
     platform: str = 'bilibili'  # 平台唯一标识符(ID)
     base_url: str = 'https://api.bilibili.com/pgc/season/index/result'  # 电影列表接口
     actors_url: str = 'https://www.bilibili.com/bangumi/play/ep'  # 演员列表接口
-    params = {  # Query参数
+    params: Mapping[str, int] = MappingProxyType({  # Query参数模板，只读
         'area': -1,
         'style_id': -1,
         'release_date': -1,
@@ -138,7 +255,7 @@ class Bilibili:
         'page': 0,
         'pagesize': pagesize,
         'type': 1,
-    }
+    })
 
     @staticmethod
     async def fetch_actors(ep_id: str) -> list[str]:
@@ -148,19 +265,17 @@ class Bilibili:
         retries = 3  # 设置重试次数
         for attempt in range(retries):
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(f'{Bilibili.actors_url}{ep_id}', headers=headers) as response:
-                        if response.status == 200:
-                            response_text = await response.text()
-                            html = etree.HTML(response_text)
-                            # 使用xpath定位到演员列表的dom元素上来获取innerText()值
-                            div_texts = html.xpath("//div[contains(text(), '出演演员')]//text()")
-                            return filter_strings(''.join(t.strip() for t in div_texts)
-                                                  .removeprefix('出演演员：').split('\n'))
-                        else:
-                            err = f"Failed to fetch data at platform {Bilibili.platform} ep_id {ep_id}."
-                            logger.error(err)
-                            raise Exception(f"{err} status code: ", response.status)
+                session = await get_session()
+                async with session.get(f'{Bilibili.actors_url}{ep_id}', headers=headers) as response:
+                    if response.status == 200:
+                        # 直接将字节交给lxml解析，省去一次完整的解码再编码
+                        response_bytes = await response.read()
+                        # 解析放到线程中执行，避免阻塞事件循环上其它并发的请求
+                        return await asyncio.to_thread(parse_actors, response_bytes, response.charset or 'utf-8')
+                    else:
+                        err = f"Failed to fetch data at platform {Bilibili.platform} ep_id {ep_id}."
+                        logger.error(err)
+                        raise Exception(f"{err} status code: ", response.status)
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 if attempt < retries - 1:  # 如果不是最后一次尝试，则等待后重试
                     await asyncio.sleep(2**attempt)  # 指数退避策略
@@ -170,21 +285,18 @@ class Bilibili:
                     raise Exception(err) from e
 
     @staticmethod
-    async def handle_data(raw_film_data: any) -> list[MovieEntityV2]:
+    async def handle_data(raw_film_data: any) -> AsyncIterator[MovieEntityV2]:
         """
         处理电影信息的入口方法，先从API中获取当前pagesize条电影数据，然后交付给fetch_actors获取演员列表
         """
-        movie_list = []
         if 'data' in raw_film_data:
             data_film_data = raw_film_data['data']
             if 'list' in data_film_data:
                 film_data = data_film_data['list']
                 for item in film_data:  # 顺序(同步)处理每个项目并添加延迟来防止风控
                     eq_id = str(item['first_ep']['ep_id'])
-                    movie = await Bilibili.create_movie_entity(item, eq_id)
-                    movie_list.append(movie)  # 将构造好的MovieEntityV2对象存入列表中
+                    yield await Bilibili.create_movie_entity(item, eq_id)  # 构造好的MovieEntityV2对象立即交付
                     await asyncio.sleep(_rick_control_timeout)  # 延迟阻塞退避风控
-        return movie_list
 
     @staticmethod
     async def create_movie_entity(item: any, eq_id: str) -> MovieEntityV2:
@@ -214,18 +326,17 @@ class Bilibili:
 
     @staticmethod
     async def raw_fetch_async(page: int,
-                              retry_on_task_id: str = '') -> list[MovieEntityV2]:
-        Bilibili.params['page'] = page - 1  # page从0开始需要对索引减去1
-        async with aiohttp.ClientSession() as session:
-            async with session.get(Bilibili.base_url,
-                                   params=Bilibili.params,
-                                   headers=headers) as response:
-                if response.status == 200:
-                    json_object = await response.json()
-                    # 写入到json中备份数据
-                    push_file_dump_msg(Bilibili.platform, page, Bilibili.pagesize, json_object, retry_on_task_id)
-                    return await Bilibili.handle_data(json_object)
-        return []
+                              retry_on_task_id: str = '') -> AsyncIterator[MovieEntityV2]:
+        params = {**Bilibili.params, 'page': page - 1}  # page从0开始需要对索引减去1
+        session = await get_session()
+        async with session.get(Bilibili.base_url, params=params, headers=headers) as response:
+            if response.status != 200:
+                return
+            json_object = await response.json(loads=orjson.loads)
+        # 写入到json中备份数据
+        push_file_dump_msg(Bilibili.platform, page, Bilibili.pagesize, json_object, retry_on_task_id)
+        async for movie in Bilibili.handle_data(json_object):
+            yield movie
 
     @staticmethod
     async def run_async(warmup: WarmupHandler,
@@ -248,75 +359,80 @@ class Tencent:
     platform: str = 'tencent'
     base_url: str = 'https://pbaccess.video.qq.com/trpc.vector_layout.page_view.PageService/getPage?video_appid=3000010'
     cover_url: str = 'https://v.qq.com/x/cover/{cid}.html'
-    payload: dict[str: any] = {
-        "page_context": {
-            "page_index": "1"  # page默认从1开始
-        },
-        "page_params": {
-            "page_id": "channel_list_second_page",
-            "page_type": "operation",
-            "channel_id": "100173",
-            "filter_params": "",
-            "page": "1",  # page默认从1开始
-            "new_mark_label_enabled": "1",
-        },
-        "page_bypass_params": {
-            "params": {
+
+    @staticmethod
+    def build_payload(page: int = 1) -> dict[str, any]:
+        """
+        每次请求单独构造请求体，避免并发任务之间互相篡改共享的类属性
+        """
+        page_str = str(page)  # page默认从1开始
+        return {
+            "page_context": {
+                "page_index": page_str
+            },
+            "page_params": {
                 "page_id": "channel_list_second_page",
                 "page_type": "operation",
                 "channel_id": "100173",
                 "filter_params": "",
-                "page": "1",
-                "caller_id": "3000010",
-                "platform_id": "2",
-                "data_mode": "default",
-                "user_mode": "default",
+                "page": page_str,
+                "new_mark_label_enabled": "1",
             },
-            "scene": "operation",
-            "abtest_bypass_id": "747ad9f34a4c8887",
-        },
-    }
+            "page_bypass_params": {
+                "params": {
+                    "page_id": "channel_list_second_page",
+                    "page_type": "operation",
+                    "channel_id": "100173",
+                    "filter_params": "",
+                    "page": page_str,
+                    "caller_id": "3000010",
+                    "platform_id": "2",
+                    "data_mode": "default",
+                    "user_mode": "default",
+                },
+                "scene": "operation",
+                "abtest_bypass_id": "747ad9f34a4c8887",
+            },
+        }
 
     @staticmethod
     async def get_movies(session: aiohttp.ClientSession,
                          page: int = 1,
-                         retry_on_task_id: str = '') -> list[MovieEntityV2]:
-        result: list[MovieEntityV2] = []
-        Tencent.payload["page_context"]["page_index"] = str(page)
-        Tencent.payload["page_params"]["page"] = str(page)
-        Tencent.payload["page_bypass_params"]["params"]["page"] = str(page)
-        async with session.post(Tencent.base_url, json=Tencent.payload) as response:
-            response_text = await response.text()
-            json_object = json.loads(response_text)
-            push_file_dump_msg(Tencent.platform, page, 30, json_object, retry_on_task_id)  # 缓存到json
-            if json_object["ret"] != 0:
-                err_msg: str = f"Error occurred when fetching movie data: {json_object['msg']}"
-                logger.error(err_msg)
-                raise ValueError(err_msg)
-            try:
-                cards = json_object["data"]["CardList"][1]["children_list"]["list"]["cards"]
-            except IndexError:
-                cards = json_object["data"]["CardList"][0]["children_list"]["list"]["cards"]
-            for item in cards:
-                movie_detail = await Tencent.get_movie_detail(session, item["params"]["cid"], item)
-                result.append(movie_detail)
-                await asyncio.sleep(_rick_control_timeout)  # 延迟阻塞退避风控
-        return result
+                         retry_on_task_id: str = '') -> AsyncIterator[MovieEntityV2]:
+        async with session.post(Tencent.base_url, json=Tencent.build_payload(page)) as response:
+            json_object = await response.json(loads=orjson.loads, content_type=None)
+        push_file_dump_msg(Tencent.platform, page, 30, json_object, retry_on_task_id)  # 缓存到json
+        if json_object["ret"] != 0:
+            err_msg: str = f"Error occurred when fetching movie data: {json_object['msg']}"
+            logger.error(err_msg)
+            raise ValueError(err_msg)
+        try:
+            cards = json_object["data"]["CardList"][1]["children_list"]["list"]["cards"]
+        except IndexError:
+            cards = json_object["data"]["CardList"][0]["children_list"]["list"]["cards"]
+        for item in cards:
+            yield await Tencent.get_movie_detail(session, item["params"]["cid"], item)
+            await asyncio.sleep(_rick_control_timeout)  # 延迟阻塞退避风控
 
     @staticmethod
     async def get_movie_detail(session: aiohttp.ClientSession, cid: str, item: dict[str, any]) -> MovieEntityV2:
         async with session.get(Tencent.cover_url.format(cid=cid)) as response:
-            response_text = await response.text()
-            matches = re.findall(r"window\.__PINIA__=(.+)?</script>", response_text)[0]
-            matches = (
-                matches.replace("undefined", "null")
-                .replace("Array.prototype.slice.call(", "")
-                .replace("})", "}")
-            )
-            json_object: any = json.loads(matches)
+            # 读取到__PINIA__数据块结束即可，无需缓冲完整的HTML页面
+            response_bytes = await read_until(response, _pinia_start, _pinia_end)
+            # 两次find定位数据块的首尾，无需正则引擎扫描整个页面
+            start = response_bytes.find(_pinia_start)
+            end = response_bytes.find(_pinia_end, start + len(_pinia_start)) if start >= 0 else -1
+            if end < 0:
+                err_msg: str = f"Cannot locate __PINIA__ payload at platform {Tencent.platform} cid {cid}."
+                logger.error(err_msg)
+                raise ValueError(err_msg)
+            matches = response_bytes[start + len(_pinia_start):end]
+            # 单次扫描完成全部JS片段到JSON的替换
+            matches = _pinia_fix_pattern.sub(lambda m: _pinia_fix_table[m.group(0)], matches)
+            json_object: any = orjson.loads(matches)
             actor_list: list[any] = json_object["introduction"]["starData"]["list"]
             try:
-                score = safe_float_conversion(json.loads(
+                score = safe_float_conversion(orjson.loads(
                     json_object['introduction']['introData']['list'][0]['item_params']['imgtag_ver']
                 )['tag_4']['text'].removesuffix('分'))
             except KeyError:
@@ -349,10 +465,10 @@ class Tencent:
 
     @staticmethod
     async def raw_fetch_async(page: int,
-                              retry_on_task_id: str = '') -> list[MovieEntityV2]:
-        async with aiohttp.ClientSession() as session:
-            movies = await Tencent.get_movies(session, page, retry_on_task_id)
-            return movies
+                              retry_on_task_id: str = '') -> AsyncIterator[MovieEntityV2]:
+        session = await get_session()
+        async for movie in Tencent.get_movies(session, page, retry_on_task_id):
+            yield movie
 
     @staticmethod
     async def run_async(warmup: WarmupHandler,
@@ -374,53 +490,49 @@ class IQiYi:
     pagesize: int = 60
     platform: str = 'iqiyi'
     base_url = 'https://mesh.if.iqiyi.com/portal/lw/videolib/data'
-    params: dict[str, str] = {
+    params: Mapping[str, str] = MappingProxyType({
         "ret_num": "60",
         "channel_id": "1",
         "page_id": "1"  # 默认从1开始
-    }
+    })
 
     @staticmethod
     async def raw_fetch_async(page: int = 1,
-                              retry_on_task_id: str = '') -> list[MovieEntityV2]:
-        async with aiohttp.ClientSession() as session:
-            IQiYi.params['page_id'] = str(page)
-            async with session.get(IQiYi.base_url, params=IQiYi.params, headers=headers) as response:
-                json_object = await response.json()  # 直接获取JSON
-                # 缓存到json
-                push_file_dump_msg(IQiYi.platform, page, IQiYi.pagesize, json_object, retry_on_task_id)
-                result: list[MovieEntityV2] = []
-                results = json_object["data"]
-                now_time: str = TimeUtil.now()
-                for data in results:
-                    result.append(
-                        MovieEntityV2(  # 添加数据到结果集
-                            _id=StringUtil.hash(data['title']),
-                            fixed_title=data['title'],
-                            create_time=now_time,
-                            update_time=now_time,
-                            platform_detail=[PlatformDetail(
-                                source=IQiYi.platform,
-                                title=data['title'],
-                                cover_url=data['image_cover'],
-                                create_time=now_time,
-                                description=data['description'],
-                                score=safe_float_conversion(data.get('sns_score', '')),
-                                directors=[x['name'] for x in data['creator']],
-                                actors=[x['name'] for x in data['contributor']],
-                                movie_type=str(data.get('tag', '')).split(';'),
-                                release_date=f'{data["date"]["year"]}-{data["date"]["month"]}-{data["date"]["day"]}',
-                                metadata={
-                                    'batch': page,
-                                    'batch_order': data['order'],
-                                    'entity_id': data['entity_id'],
-                                    'album_id': data['album_id'],
-                                    'tv_id': data['tv_id'],
-                                }
-                            )],
-                        )
-                    )
-                return result
+                              retry_on_task_id: str = '') -> AsyncIterator[MovieEntityV2]:
+        session = await get_session()
+        params = {**IQiYi.params, 'page_id': str(page)}
+        async with session.get(IQiYi.base_url, params=params, headers=headers) as response:
+            json_object = await response.json(loads=orjson.loads)  # 直接获取JSON
+        # 缓存到json
+        push_file_dump_msg(IQiYi.platform, page, IQiYi.pagesize, json_object, retry_on_task_id)
+        results = json_object["data"]
+        now_time: str = TimeUtil.now()
+        for data in results:
+            yield MovieEntityV2(  # 添加数据到结果集
+                _id=StringUtil.hash(data['title']),
+                fixed_title=data['title'],
+                create_time=now_time,
+                update_time=now_time,
+                platform_detail=[PlatformDetail(
+                    source=IQiYi.platform,
+                    title=data['title'],
+                    cover_url=data['image_cover'],
+                    create_time=now_time,
+                    description=data['description'],
+                    score=safe_float_conversion(data.get('sns_score', '')),
+                    directors=[x['name'] for x in data['creator']],
+                    actors=[x['name'] for x in data['contributor']],
+                    movie_type=str(data.get('tag', '')).split(';'),
+                    release_date=f'{data["date"]["year"]}-{data["date"]["month"]}-{data["date"]["day"]}',
+                    metadata={
+                        'batch': page,
+                        'batch_order': data['order'],
+                        'entity_id': data['entity_id'],
+                        'album_id': data['album_id'],
+                        'tv_id': data['tv_id'],
+                    }
+                )],
+            )
 
     @staticmethod
     async def run_async(warmup: WarmupHandler,
@@ -455,83 +567,80 @@ class YouKu:
 
     @staticmethod
     async def get_movie_info(obj_data: any):
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https:' + obj_data["videoLink"]) as response:
-                html = await response.text()
-                j = re.findall(r"__INITIAL_DATA__ =(.+)?;<", html)[0]
-                json_object = json.loads(j)
-                root_data = json_object["data"]["data"]
-                root_nodes = json_object["data"]["model"]["detail"]["data"]["nodes"]
-                item = {
-                    'intro': '',
-                    'release_date': '',
-                    'cover_url': '',
-                    'score': -1.0,
-                    'movie_type': [],
-                    'directors': [],
-                    'actors': []
-                }
-                if root_data["type"] == 10001:
-                    item['release_date'] = root_data["data"]["extra"]["showReleaseTime"]  # 发布日期
-                for node in root_nodes:
-                    if not node["type"] == 10001:
+        session = await get_session()
+        async with session.get('https:' + obj_data["videoLink"]) as response:
+            html = await response.text()
+            j = re.findall(r"__INITIAL_DATA__ =(.+)?;<", html)[0]
+            json_object = orjson.loads(j)
+            root_data = json_object["data"]["data"]
+            root_nodes = json_object["data"]["model"]["detail"]["data"]["nodes"]
+            item = {
+                'intro': '',
+                'release_date': '',
+                'cover_url': '',
+                'score': -1.0,
+                'movie_type': [],
+                'directors': [],
+                'actors': []
+            }
+            if root_data["type"] == 10001:
+                item['release_date'] = root_data["data"]["extra"]["showReleaseTime"]  # 发布日期
+            for node in root_nodes:
+                if not node["type"] == 10001:
+                    continue
+                sub_nodes = node["nodes"]
+                for sub_node in sub_nodes:
+                    if not sub_node["type"] == 20009:
                         continue
-                    sub_nodes = node["nodes"]
-                    for sub_node in sub_nodes:
-                        if not sub_node["type"] == 20009:
-                            continue
-                        child_nodes = sub_node["nodes"]
-                        for child_node in child_nodes:
-                            if child_node["type"] == 20010:
-                                data = child_node["data"]
-                                item['cover_url'] = data["showImgV"]
-                                item['score'] = safe_float_conversion(data.get('score', ''))
-                                item['movie_type'] = data["introSubTitle"]
-                                item['intro'] = data["desc"]
-                            elif child_node["type"] == 10011:
-                                data = child_node["data"]
-                                if "导演" in data["subtitle"]:
-                                    item['directors'].append(data["title"])
-                                else:
-                                    item['actors'].append(data["title"])
-                now_time: str = TimeUtil.now()
-                return MovieEntityV2(  # 添加数据到结果集
-                    _id=StringUtil.hash(obj_data["title"]),
-                    fixed_title=obj_data["title"],
+                    child_nodes = sub_node["nodes"]
+                    for child_node in child_nodes:
+                        if child_node["type"] == 20010:
+                            data = child_node["data"]
+                            item['cover_url'] = data["showImgV"]
+                            item['score'] = safe_float_conversion(data.get('score', ''))
+                            item['movie_type'] = data["introSubTitle"]
+                            item['intro'] = data["desc"]
+                        elif child_node["type"] == 10011:
+                            data = child_node["data"]
+                            if "导演" in data["subtitle"]:
+                                item['directors'].append(data["title"])
+                            else:
+                                item['actors'].append(data["title"])
+            now_time: str = TimeUtil.now()
+            return MovieEntityV2(  # 添加数据到结果集
+                _id=StringUtil.hash(obj_data["title"]),
+                fixed_title=obj_data["title"],
+                create_time=now_time,
+                update_time=now_time,
+                platform_detail=[PlatformDetail(
+                    source=YouKu.platform,
+                    title=obj_data["title"],
+                    cover_url=item['cover_url'],
                     create_time=now_time,
-                    update_time=now_time,
-                    platform_detail=[PlatformDetail(
-                        source=YouKu.platform,
-                        title=obj_data["title"],
-                        cover_url=item['cover_url'],
-                        create_time=now_time,
-                        description=item['intro'],
-                        score=item['score'],
-                        directors=item['directors'],
-                        actors=item['actors'],
-                        movie_type=item['movie_type'],
-                        release_date=item['release_date'],
-                        metadata={
-                            'summary': obj_data
-                        }
-                    )],
-                )
+                    description=item['intro'],
+                    score=item['score'],
+                    directors=item['directors'],
+                    actors=item['actors'],
+                    movie_type=item['movie_type'],
+                    release_date=item['release_date'],
+                    metadata={
+                        'summary': obj_data
+                    }
+                )],
+            )
 
     @staticmethod
     async def raw_fetch_async(page: int = 1,
-                              retry_on_task_id: str = '') -> list[MovieEntityV2]:
-        async with aiohttp.ClientSession(headers=YouKu.youku_headers) as session:
-            async with session.get(f'{YouKu.base_url}{page}') as response:
-                json_object = await response.json()
-                # 缓存到json
-                push_file_dump_msg(YouKu.platform, page, YouKu.pagesize, json_object, retry_on_task_id)
-                result: list[MovieEntityV2] = []
-                results = json_object["data"]["filterData"]["listData"]
-                for data in results:
-                    fetch_res: MovieEntityV2 = await YouKu.get_movie_info(data)
-                    result.append(fetch_res)
-                    await asyncio.sleep(_rick_control_timeout)
-                return result
+                              retry_on_task_id: str = '') -> AsyncIterator[MovieEntityV2]:
+        session = await get_session()
+        async with session.get(f'{YouKu.base_url}{page}', headers=YouKu.youku_headers) as response:
+            json_object = await response.json(loads=orjson.loads)
+        # 缓存到json
+        push_file_dump_msg(YouKu.platform, page, YouKu.pagesize, json_object, retry_on_task_id)
+        results = json_object["data"]["filterData"]["listData"]
+        for data in results:
+            yield await YouKu.get_movie_info(data)
+            await asyncio.sleep(_rick_control_timeout)
 
     @staticmethod
     async def run_async(warmup: WarmupHandler,
@@ -553,7 +662,7 @@ class MgTV:
     pagesize: int = 60
     platform: str = 'mgtv'
     base_url: str = 'https://pianku.api.mgtv.com/rider/list/pcweb/v3'
-    params: dict[str, str | int] = {
+    params: Mapping[str, str | int] = MappingProxyType({
         'allowedRC': 1,
         'platform': 'pcweb',
         'channelId': 3,
@@ -567,46 +676,42 @@ class MgTV:
         'year': 'all',
         'chargeInfo': 'a1',
         'sort': 'c2'
-    }
+    })
 
     @staticmethod
     async def raw_fetch_async(page: int = 1,
-                              retry_on_task_id: str = '') -> list[MovieEntityV2]:
-        MgTV.params['pn'] = page
-        async with aiohttp.ClientSession() as session:
-            async with session.get(MgTV.base_url, params=MgTV.params) as response:
-                json_object = await response.json()  # 直接获取JSON
-                # 缓存到json
-                push_file_dump_msg(MgTV.platform, page, MgTV.pagesize, json_object, retry_on_task_id)
-                result: list[MovieEntityV2] = []
-                results = json_object['data']['hitDocs']
-                now_time: str = TimeUtil.now()
-                for data in results:
-                    result.append(
-                        MovieEntityV2(  # 添加数据到结果集
-                            _id=StringUtil.hash(data['title']),
-                            fixed_title=data['title'],
-                            create_time=now_time,
-                            update_time=now_time,
-                            platform_detail=[PlatformDetail(
-                                source=MgTV.platform,
-                                title=data['title'],
-                                cover_url=data['img'],
-                                create_time=now_time,
-                                description=data['story'],
-                                score=safe_float_conversion(data.get('zhihuScore', '')),
-                                actors=str(data['subtitle']).split(','),
-                                movie_type=data['kind'],
-                                release_date=data['year'],
-                                metadata={
-                                    'clip_id': data['clipId'],
-                                    'views': data['views'],
-                                    'update_time': data['se_updateTime'],
-                                }
-                            )],
-                        )
-                    )
-                return result
+                              retry_on_task_id: str = '') -> AsyncIterator[MovieEntityV2]:
+        params = {**MgTV.params, 'pn': page}
+        session = await get_session()
+        async with session.get(MgTV.base_url, params=params) as response:
+            json_object = await response.json(loads=orjson.loads)  # 直接获取JSON
+        # 缓存到json
+        push_file_dump_msg(MgTV.platform, page, MgTV.pagesize, json_object, retry_on_task_id)
+        results = json_object['data']['hitDocs']
+        now_time: str = TimeUtil.now()
+        for data in results:
+            yield MovieEntityV2(  # 添加数据到结果集
+                _id=StringUtil.hash(data['title']),
+                fixed_title=data['title'],
+                create_time=now_time,
+                update_time=now_time,
+                platform_detail=[PlatformDetail(
+                    source=MgTV.platform,
+                    title=data['title'],
+                    cover_url=data['img'],
+                    create_time=now_time,
+                    description=data['story'],
+                    score=safe_float_conversion(data.get('zhihuScore', '')),
+                    actors=str(data['subtitle']).split(','),
+                    movie_type=data['kind'],
+                    release_date=data['year'],
+                    metadata={
+                        'clip_id': data['clipId'],
+                        'views': data['views'],
+                        'update_time': data['se_updateTime'],
+                    }
+                )],
+            )
 
     @staticmethod
     async def run_async(warmup: WarmupHandler,
@@ -1,9 +1,9 @@
 import os
 
-import json
-from dataclasses import asdict, fields
+from dataclasses import fields
 from typing import List
 
+import orjson
 from kafka import KafkaProducer, KafkaClient, KafkaConsumer
 
 from movie_repository.entity.entity_movie import MovieEntityV2
@@ -40,6 +40,9 @@ json_file: [str] = [
     'iqiyi',  # 爱奇艺
     'youku',  # 优酷
 ]
+# 推送到数据库的MovieEntityV2字段，排除标记为exclude的字段，只需计算一次
+_movie_insert_fields: tuple[str, ...] = tuple(field.name for field in fields(MovieEntityV2)
+                                              if not field.metadata.get('exclude'))
 
 
 async def init_configuration():
@@ -77,14 +80,14 @@ def push_file_dump_msg(file_name: str,
         logger.error(err_msg)
         raise ValueError(err_msg)
 
-    message = json.dumps({
+    message = orjson.dumps({
         "file_name": file_name,
         "batch": batch,
         "pagesize": pagesize,
         "data_set": data_set,
         "retry_on_task_id": retry_on_task_id
     })
-    kafka_producer.send(kafka_file_topic, message.encode('utf-8'))
+    kafka_producer.send(kafka_file_topic, message)
 
 
 def push_db_insert_msg(movies: List[MovieEntityV2]):
@@ -92,12 +95,9 @@ def push_db_insert_msg(movies: List[MovieEntityV2]):
     将新增的数据推送到kafka顺序消费
     """
     for movie in movies:
-        # 转换dataclass到dict，并移除不需要的字段
-        movie_dict = asdict(movie)
-        exclude_fields = {field.name for field in fields(movie) if field.metadata.get('exclude')}
-        for field in exclude_fields:
-            movie_dict.pop(field, None)
-        kafka_producer.send(kafka_db_topic, json.dumps(movie_dict).encode('utf-8'))
+        # 浅拷贝需要的字段而非asdict深拷贝，嵌套的PlatformDetail交由orjson直接序列化
+        movie_dict = {name: getattr(movie, name) for name in _movie_insert_fields}
+        kafka_producer.send(kafka_db_topic, orjson.dumps(movie_dict))
 
 
 def consume_messages(consumer, topic_name):
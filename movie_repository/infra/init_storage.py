@@ -23,10 +23,19 @@ warmup_path: str = os.path.join(init_config.saves_path, 'warmup.yaml')
 
 
 async def init_database(total: int) -> WarmupHandler:
+    await ensure_indexes()  # 声明查询所需的索引
     warmup: WarmupHandler = await warmup_system(total)  # 预热系统数据
     return warmup
 
 
+async def ensure_indexes():
+    """
+    声明电影表的查询索引，create_index是幂等的，索引已存在时不会重建
+    """
+    await collections.create_index([("platform_data.source", 1), ("_id", 1)])
+    await collections.create_index([("fixed_title", "text")], default_language='none')
+
+
 async def warmup_system(total: int) -> WarmupHandler:
     """
     从已有的Saves中定位状态和时间版本来决定这次是否要重新爬取数据
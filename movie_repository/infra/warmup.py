@@ -1,5 +1,4 @@
 import asyncio
-import json
 import os
 import uuid
 from collections import defaultdict
@@ -8,9 +7,12 @@ from datetime import datetime
 from enum import Enum
 
 import aiofiles
+import orjson
 import yaml
 from kafka import KafkaConsumer
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from movie_repository.entity import WarmupData
 from movie_repository.infra import fetch
@@ -19,6 +21,8 @@ from movie_repository.infra.init_config import saves_path, kafka_db_topic, \
 from movie_repository.util import logger
 from movie_repository.util.default_util import TimeUtil
 
+_db_bulk_size = 500  # 每次批量写入数据库的文档数量
+
 
 class Status(str, Enum):
     PENDING = "PENDING"
@@ -51,35 +55,49 @@ class WarmupHandler:
         return False
 
     def put_file_trace(self, task_id: str, directory: str, batch: int, pagesize: int,
-                       status: Status, begin: str = "", end: str = ""):
+                       status: Status, begin_ns: int = 0, end_ns: int = 0):
         trace_item: dict[str, any] = {
             'task_id': task_id,
             'directory': directory,
             'file_name': batch,
             'pagesize': pagesize,
             'status': status.value,
-            'begin': begin,
-            'end': end,
+            'begin': begin_ns,
+            'end': end_ns,
         }
         self.put_trace('file', trace_item)
 
     def put_batch_trace(self, task_id: str, source: str, batch: int, pagesize: int,
-                        status: Status, begin: str = "", end: str = ""):
+                        status: Status, begin_ns: int = 0, end_ns: int = 0):
         trace_item: dict[str, any] = {
             'task_id': task_id,
             'source': source,
             'batch': batch,
             'pagesize': pagesize,
             'status': status.value,
-            'begin': begin,
-            'end': end,
+            'begin': begin_ns,
+            'end': end_ns,
         }
         self.put_trace('batch', trace_item)
 
+    def put_db_trace(self, task_id: str, collection: str, count: int,
+                     status: Status, begin_ns: int = 0, end_ns: int = 0):
+        trace_item: dict[str, any] = {
+            'task_id': task_id,
+            'collection': collection,
+            'count': count,
+            'status': status.value,
+            'begin': begin_ns,
+            'end': end_ns,
+        }
+        self.put_trace('db', trace_item)
+
     def put_trace(self, node: str, val: dict[str, any]):
         read_data = self.warmup_data
         if node == 'file':
             trace_list = read_data.snapshot.file.trace
+        elif node == 'db':
+            trace_list = read_data.snapshot.db.trace
         else:
             trace_list = read_data.snapshot.batch.trace
         # 查找并更新或插入新的记录
@@ -107,8 +125,7 @@ class WarmupHandler:
         with open(self.path, 'w', encoding='utf-8') as file:
             yaml.dump(asdict(self.warmup_data), file)
 
-    @staticmethod
-    async def consume_kafka_db_dump(collection: AsyncIOMotorCollection):
+    async def consume_kafka_db_dump(self, collection: AsyncIOMotorCollection):
         """
         消费kafka的数据库新增消息
         """
@@ -120,10 +137,11 @@ class WarmupHandler:
                                                          enable_auto_commit=True,
                                                          consumer_timeout_ms=1000)
         counter = 0
+        operations: list[UpdateOne] = []
         for msg in kafka_db_consumer:
-            data = json.loads(msg.value.decode('utf-8'))
+            data = orjson.loads(msg.value)
             platform_data_item = data.pop('platform_detail')[0]
-            await collection.update_one(
+            operations.append(UpdateOne(
                 {"_id": data['_id']},
                 [{
                     "$set": {
@@ -155,12 +173,38 @@ class WarmupHandler:
                     }
                 }],
                 upsert=True
-            )
-            counter += 1
+            ))
+            if len(operations) >= _db_bulk_size:
+                counter += await self.flush_db_operations(collection, operations)
+                operations = []
+        if operations:
+            counter += await self.flush_db_operations(collection, operations)
         logger.info(f'Successfully saving {counter} record(s) into mongodb.')
         logger.info('(Kafka Lifecycle) Closing Kafka DB Consumer.')
         kafka_db_consumer.close()
 
+    async def flush_db_operations(self, collection: AsyncIOMotorCollection,
+                                  operations: list[UpdateOne]) -> int:
+        """
+        将累积的更新操作一次性批量提交到数据库，返回成功写入的数量
+        同一_id可能在一批中出现多次(多平台合并)，因此必须按顺序执行
+        """
+        db_task_id = generate_key('DB.TASK')
+        db_begin_ns = TimeUtil.now_ns()
+        status = Status.FINISHED
+        try:
+            result = await collection.bulk_write(operations, ordered=True)
+            count = result.upserted_count + result.matched_count
+        except BulkWriteError as e:
+            # 有序写入在首个失败处停止，需要在trace中标记为ERROR
+            count = e.details['nUpserted'] + e.details['nMatched']
+            if e.details['writeErrors']:
+                status = Status.ERROR
+            logger.error(f'Bulk write {db_task_id} finished with {len(e.details["writeErrors"])} error(s).')
+        self.put_db_trace(task_id=db_task_id, collection=collection.name, count=count,
+                          status=status, begin_ns=db_begin_ns, end_ns=TimeUtil.now_ns())
+        return count
+
     async def consume_kafka_file_dump(self):
         """
         消费掉所有kafka中的file消息，写入json文件
@@ -174,7 +218,7 @@ class WarmupHandler:
                                                            consumer_timeout_ms=1000)
         counter = 0
         for msg in kafka_file_consumer:
-            data = json.loads(msg.value.decode('utf-8'))
+            data = orjson.loads(msg.value)
             # 写入逻辑
             retry_on_task_id: str = data['retry_on_task_id']
             file_name: str = data['file_name']
@@ -184,16 +228,16 @@ class WarmupHandler:
             # 从kafka消费消息来顺序写入文件
             file_task_id = retry_on_task_id if retry_on_task_id.startswith('FILE.TASK') else generate_key(
                 'FILE.TASK')
-            file_begin_time = TimeUtil.now()
+            file_begin_ns = TimeUtil.now_ns()
             self.put_file_trace(task_id=file_task_id, directory=file_name,
                                 batch=batch, pagesize=pagesize, status=Status.PENDING,
-                                begin=file_begin_time)
+                                begin_ns=file_begin_ns)
             file_path = os.path.join(saves_path, file_name, f'{file_name}_{batch}.json')
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as file:
-                await file.write(json.dumps(data_set, indent=4))
+            async with aiofiles.open(file_path, 'wb') as file:
+                await file.write(orjson.dumps(data_set, option=orjson.OPT_INDENT_2))
             self.put_file_trace(task_id=file_task_id, directory=file_name,
                                 batch=batch, pagesize=pagesize, status=Status.FINISHED,
-                                begin=file_begin_time, end=TimeUtil.now())
+                                begin_ns=file_begin_ns, end_ns=TimeUtil.now_ns())
             counter += 1
         logger.info(f"Successfully saving {counter} json file(s) into 'saves'.")
         logger.info('(Kafka Lifecycle) Closing Kafka File Consumer.')
@@ -208,9 +252,15 @@ class WarmupHandler:
             component = getattr(self.warmup_data.snapshot, component_name)
             for trace in component.trace:
                 if trace.get('status') != Status.FINISHED.value:
+                    if component_name == 'db':
+                        # 数据库批量写入的消息已被kafka提交，无法按平台批次回滚，仅记录日志
+                        logger.error(f'(Rollback) DB task {trace["task_id"]} with {trace["status"]} '
+                                     f'on collection {trace.get("collection")} cannot be rollback.')
+                        continue
                     platform = trace['source']
                     task_id = trace['task_id']
                     results[platform][task_id] = int(trace['batch'])
                     logger.info(f'(Rollback) Task {task_id} with {trace["status"]} '
+                                f'(began at {TimeUtil.format_ns(trace.get("begin"))}) '
                                 f'at {platform} platform will be rollback.')
         await fetch.rollback_all(self, results)
@@ -1,8 +1,37 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+
+from infra.init_storage import collections
 
 router = APIRouter()
+# 列表视图不返回体积较大的演员和简介字段，完整数据通过详情接口获取
+_list_projection = {"platform_data.actors": 0, "platform_data.description": 0}
 
 
 @router.get("/items")
 async def read_items():
     return [{"name": "Item Foo"}, {"name": "Item Bar"}]
+
+
+@router.get("/movies")
+async def get_paginated_movies(after_id: str | None = Query(None),
+                               pagesize: int = Query(20, ge=1, le=100)):
+    """
+    基于_id游标的分页查询，避免skip()在深分页时扫描并丢弃大量文档
+    """
+    query = {"_id": {"$gt": after_id}} if after_id else {}
+    cursor = collections.find(query, _list_projection).sort("_id", 1).hint("_id_").limit(pagesize)
+    movies = await cursor.to_list(length=pagesize)
+    # 下一页的游标为本页最后一条记录的_id
+    next_cursor = movies[-1]["_id"] if len(movies) == pagesize else None
+    return {"data": movies, "next_cursor": next_cursor}
+
+
+@router.get("/movies/{movie_id}")
+async def get_movie_detail(movie_id: str):
+    """
+    根据_id获取电影的完整数据
+    """
+    movie = await collections.find_one({"_id": movie_id})
+    if movie is None:
+        raise HTTPException(status_code=404, detail=f"Movie '{movie_id}' not found.")
+    return movie
@@ -1,4 +1,6 @@
+import asyncio
 import re
+import time
 from dataclasses import asdict, fields
 from datetime import timezone, timedelta, datetime
 from hashlib import sha256
@@ -31,3 +33,52 @@ class TimeUtil:
         格式为：2024-05-35 21:26:17,253
         """
         return datetime.now(_tz_utc_8).strftime(_time_formatter)[:-3]
+
+    @staticmethod
+    def now_ns() -> int:
+        """
+        获取纳秒级的整数时间戳，用于高频写入的trace，仅在展示时再格式化
+        """
+        return time.time_ns()
+
+    @staticmethod
+    def format_ns(ns: any) -> str:
+        """
+        将纳秒时间戳格式化为与now()一致的UTC+8时间字符串
+        旧版本warmup.yaml中记录的字符串时间原样返回
+        """
+        if not isinstance(ns, int):
+            return str(ns)
+        return datetime.fromtimestamp(ns / 1e9, _tz_utc_8).strftime(_time_formatter)[:-3]
+
+
+class RateLimiter:
+    """
+    令牌桶限流器，在time_period秒内最多放行max_rate次
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = max_rate
+        self._last_check = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                # 按流逝的时间补充令牌，最多补满桶容量
+                self._tokens = min(self.max_rate,
+                                   self._tokens + (now - self._last_check) * self.max_rate / self.time_period)
+                self._last_check = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None